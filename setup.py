@@ -30,6 +30,7 @@ DEV_REQUIRES = [
     "sphinx-autodoc-typehints",
     "mypy>=0.760",
     "isort",
+    "numba",
 ]
 
 
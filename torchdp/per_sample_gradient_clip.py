@@ -32,7 +32,7 @@ Note: there is only a single .backward() call as the second pass just works on t
 the stored grad_sample.
 """
 
-from typing import Callable, Iterator, Optional, Tuple
+from typing import Callable, Iterator, List, Optional, Tuple
 
 import torch
 from torch import nn
@@ -144,7 +144,7 @@ class PerSampleGradientClipper:
         """
         return self._aggr_thresh, self._aggr_batch_size
 
-    def pre_step(self) -> Tuple[torch.Tensor, int]:
+    def pre_step(self) -> Tuple[List[nn.Parameter], torch.Tensor, int]:
         r"""
         Prepares the ``.grad`` field of the parameters and provides statistics on the
         maximum gradient norm which should be used to scale noise in the privacy engine
@@ -153,9 +153,10 @@ class PerSampleGradientClipper:
 
         Returns
         --------
-        Tuple[torch.Tensor, int]
-            Returns the maximum gradient norm per batch (repeated in batch dimension
-            as a tensor) and the batch size
+        Tuple[List[torch.nn.Parameter], torch.Tensor, int]
+            Returns the parameters whose ``.grad`` field was prepared, the maximum
+            gradient norm per batch (repeated for each of these parameters as a
+            tensor) and the batch size
         """
 
         # check if we've already accumulated clipped gradients for this batch
@@ -164,19 +165,48 @@ class PerSampleGradientClipper:
 
         threshs, batch_size = self._get_aggregated_state()
         # now that we know the full batch size, we can average the gradients
-        n = 0
+        params = []
         for _, p in self._named_params():
             p.grad = self._scale_summed_grad(  # pyre-ignore[16]
                 p.summed_grad, batch_size  # pyre-ignore[16]
             )
-            n += 1
+            params.append(p)
             del p.summed_grad
 
         # NOTE: For Renyi-based epsilon calculation, we will calculate a flat
         # max norm equal to the norm of all clip values per layer.
-        max_norm = threshs.new_full((n,), threshs.norm(2))  # pyre-ignore[16]
+        max_norm = threshs.new_full((len(params),), threshs.norm(2))  # pyre-ignore[16]
         self._reset_aggregated_state()
-        return max_norm, batch_size
+        return params, max_norm, batch_size
+
+    def has_grad_samples(self) -> bool:
+        r"""
+        Checks whether the parameters hold per-sample gradients that were not
+        clipped and accumulated yet.
+
+        Returns
+        --------
+        bool
+            True if a backward pass happened since the last call to
+            :meth:`~torchdp.per_sample_gradient_clip.PerSampleGradientClipper.clip_and_accumulate`
+
+        Raises
+        -------
+        ValueError
+            If only some of the parameters have per-sample gradients, for example
+            when a layer was not used in the last forward pass
+        """
+        has_grad_sample = [hasattr(p, "grad_sample") for _, p in self._named_params()]
+        if all(has_grad_sample):
+            return True
+        if not any(has_grad_sample):
+            return False
+        missing = [
+            name
+            for (name, _), has in zip(self._named_params(), has_grad_sample)
+            if not has
+        ]
+        raise ValueError(f"Per-sample gradients are missing for parameters {missing}")
 
     def clip_and_accumulate(self) -> None:
         r"""
@@ -185,7 +215,19 @@ class PerSampleGradientClipper:
         :meth:`~torchdp.per_sample_gradient_clip.PerSampleGradientClipper.pre_step`
         will populate the ``.grad`` field with the average gradient over the entire batch of size
         ``(N-1)* B + b`` with ``b <= B``.
+
+        Raises
+        -------
+        ValueError
+            If there are no per-sample gradients to clip, i.e. no backward pass
+            happened since the last call
         """
+        if not self.has_grad_samples():
+            raise ValueError(
+                "No per-sample gradients to clip. You need to call backward() "
+                "before clipping them again"
+            )
+
         # step 0 : calculate the layer norms
         all_norms = calc_sample_norms(
             named_params=self._named_grad_samples(),
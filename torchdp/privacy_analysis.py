@@ -34,6 +34,14 @@ import numpy as np
 from scipy import special
 
 
+try:
+    from numba import njit
+except ImportError:
+
+    def njit(*args, **kwargs):
+        return lambda func: func
+
+
 ########################
 # LOG-SPACE ARITHMETIC #
 ########################
@@ -121,20 +129,37 @@ def _compute_log_a_for_int_alpha(q: float, sigma: float, alpha: int) -> float:
         :math:`log(A_\alpha)` as defined in Section 3.3 of https://arxiv.org/pdf/1908.10530.pdf.
     """
 
+    return float(_log_a_for_int_alpha_kernel(q, sigma, alpha))
+
+
+@njit(cache=True)
+def _log_a_for_int_alpha_kernel(q: float, sigma: float, alpha: int) -> float:
+    r"""Loop of :func:`_compute_log_a_for_int_alpha`, compiled with numba when
+    it is installed.
+
+    The binomial coefficients and the log space additions are inlined, so that
+    the loop only performs scalar math.
+    """
     # Initialize with 0 in the log space.
     log_a = -np.inf
+    log_q, log_1mq = math.log(q), math.log(1 - q)
+    lgamma_alpha = math.lgamma(alpha + 1)
 
     for i in range(alpha + 1):
         log_coef_i = (
-            math.log(special.binom(alpha, i))
-            + i * math.log(q)
-            + (alpha - i) * math.log(1 - q)
+            lgamma_alpha
+            - math.lgamma(i + 1)
+            - math.lgamma(alpha - i + 1)
+            + i * log_q
+            + (alpha - i) * log_1mq
         )
 
         s = log_coef_i + (i * i - i) / (2 * (sigma ** 2))
-        log_a = _log_add(log_a, s)
+        # inlined _log_add(log_a, s)
+        a, b = min(log_a, s), max(log_a, s)
+        log_a = b if a == -np.inf else math.log1p(math.exp(a - b)) + b
 
-    return float(log_a)
+    return log_a
 
 
 def _compute_log_a_for_frac_alpha(q: float, sigma: float, alpha: float) -> float:
@@ -3,10 +3,11 @@
 from __future__ import annotations
 
 import os
-import types
+import threading
 import warnings
 from typing import List, Optional, Tuple, Union
 
+import numpy as np
 import torch
 from torch import nn
 
@@ -16,6 +17,44 @@ from .per_sample_gradient_clip import PerSampleGradientClipper
 from .utils import clipping
 
 
+# Seeds are dealt from a block of OS randomness, read once and refilled when
+# exhausted, instead of reading /dev/urandom every time an engine is created.
+_SEED_POOL_SIZE = 4096
+_SEED_SIZE = 8
+_seed_pool = b""
+_seed_pool_offset = 0
+_seed_pool_lock = threading.Lock()
+
+
+def _reset_seed_pool():
+    global _seed_pool, _seed_pool_offset, _seed_pool_lock
+    _seed_pool, _seed_pool_offset = b"", 0
+    _seed_pool_lock = threading.Lock()
+
+
+if hasattr(os, "register_at_fork"):
+    # a forked process must not deal out the same seeds as its parent
+    os.register_at_fork(after_in_child=_reset_seed_pool)
+
+
+def _get_secure_seed() -> int:
+    r"""
+    Returns a cryptographically secure seed taken from the seed pool.
+
+    Returns
+    -------
+    int
+        A signed 64-bit seed
+    """
+    global _seed_pool, _seed_pool_offset
+    with _seed_pool_lock:
+        if _seed_pool_offset + _SEED_SIZE > len(_seed_pool):
+            _seed_pool, _seed_pool_offset = os.urandom(_SEED_POOL_SIZE), 0
+        seed_bytes = _seed_pool[_seed_pool_offset : _seed_pool_offset + _SEED_SIZE]
+        _seed_pool_offset += _SEED_SIZE
+    return int.from_bytes(seed_bytes, byteorder="big", signed=True)
+
+
 class PrivacyEngine:
     r"""
     The main component of Pytorch DP is the ``PrivacyEngine``.
@@ -84,6 +123,7 @@ class PrivacyEngine:
             Other arguments to the init
         """
         self.steps = 0
+        self._per_step_rdp = None  # lazily computed in _get_per_step_rdp
         self.module = module
         self.alphas = alphas
         self.device = next(module.parameters()).device
@@ -102,6 +142,37 @@ class PrivacyEngine:
 
         self.loss_reduction = loss_reduction
 
+    @property
+    def alphas(self) -> List[float]:
+        return self._alphas
+
+    @alphas.setter
+    def alphas(self, alphas: List[float]):
+        self._alphas = alphas
+        # converted once for the accountant; ``_orders`` keeps the caller's
+        # dtype so that the reported optimal alpha reads back as given
+        self._orders = np.atleast_1d(list(alphas))
+        self._alphas_np = self._orders.astype(np.float64)
+        self._per_step_rdp = None
+
+    @property
+    def sample_rate(self) -> float:
+        return self._sample_rate
+
+    @sample_rate.setter
+    def sample_rate(self, sample_rate: float):
+        self._sample_rate = sample_rate
+        self._per_step_rdp = None
+
+    @property
+    def noise_multiplier(self) -> float:
+        return self._noise_multiplier
+
+    @noise_multiplier.setter
+    def noise_multiplier(self, noise_multiplier: float):
+        self._noise_multiplier = noise_multiplier
+        self._per_step_rdp = None
+
     def detach(self):
         r"""
         Detaches the privacy engine from optimizer.
@@ -113,7 +184,7 @@ class PrivacyEngine:
         optim = self.optimizer
         optim.privacy_engine = None
         self.clipper.close()
-        optim.step = types.MethodType(optim.original_step, optim)
+        optim.step = optim.original_step
         del optim.virtual_step
 
     def attach(self, optimizer: torch.optim.Optimizer):
@@ -139,6 +210,14 @@ class PrivacyEngine:
         """
 
         self.validator.validate(self.module)
+        if self.loss_reduction not in ("sum", "mean"):
+            raise ValueError(
+                f"Loss reduction must be either sum or mean. Got {self.loss_reduction}"
+            )
+        # the reduction is fixed once attached, so resolve it here and not per step
+        # pyre-fixme[16]: `PrivacyEngine` has no attribute `_average_noise`.
+        self._average_noise = self.loss_reduction == "mean"
+
         norm_clipper = (
             # pyre-fixme[6]: Expected `float` for 1st param but got
             #  `Union[List[float], float]`.
@@ -165,37 +244,64 @@ class PrivacyEngine:
             self.module, norm_clipper, self.batch_first
         )
 
-        def dp_step(self, closure=None):
-            self.privacy_engine.step()
-            self.original_step(closure)
+        # The closures capture the original step directly. The engine is still
+        # looked up on the optimizer: holding it here would keep it alive after
+        # ``del optimizer.privacy_engine``, together with its hooks on the module.
+        original_step = optimizer.step
+
+        def dp_step(closure=None):
+            optimizer.privacy_engine.step()
+            return original_step(closure)
+
+        def virtual_step():
+            optimizer.privacy_engine.virtual_step()
 
         # pyre-fixme[16]: `Optimizer` has no attribute `privacy_engine`.
         optimizer.privacy_engine = self
         # pyre-fixme[16]: `Optimizer` has no attribute `original_step`.
-        optimizer.original_step = optimizer.step
+        optimizer.original_step = original_step
         # pyre-fixme[8]: Attribute has type
         #  `BoundMethod[typing.Callable(torch.optim.Optimizer.step)[[Named(self,
         #  torch.optim.Optimizer), Named(closure, typing.Optional[typing.Callable[[],
         #  torch.Tensor]], default)], typing.Optional[torch.Tensor]],
-        #  torch.optim.Optimizer]`; used as `MethodType`.
-        optimizer.step = types.MethodType(dp_step, optimizer)
-
-        def virtual_step(self):
-            self.privacy_engine.virtual_step()
+        #  torch.optim.Optimizer]`; used as `Callable`.
+        optimizer.step = dp_step
 
         # pyre-fixme[16]: `Optimizer` has no attribute `virtual_step`.
-        optimizer.virtual_step = types.MethodType(virtual_step, optimizer)
+        optimizer.virtual_step = virtual_step
 
         # pyre-fixme[16]: `PrivacyEngine` has no attribute `optimizer`.
         self.optimizer = optimizer  # create a cross reference for detaching
 
-    def get_renyi_divergence(self):
-        rdp = torch.tensor(
-            tf_privacy.compute_rdp(
-                self.sample_rate, self.noise_multiplier, 1, self.alphas
+    def get_renyi_divergence(self) -> torch.Tensor:
+        r"""
+        Computes the RDP of a single step of the Sampled Gaussian Mechanism
+        at every order in ``alphas``.
+
+        The result only depends on ``sample_rate``, ``noise_multiplier`` and
+        ``alphas``, so it is computed once and cached until one of them changes.
+
+        Returns
+        -------
+        torch.Tensor
+            The per-step RDP guarantees at all orders. This is a copy of the
+            cached value, so it can be safely modified by the caller.
+        """
+        return self._get_per_step_rdp().clone()
+
+    def _get_per_step_rdp(self) -> torch.Tensor:
+        r"""
+        Returns the cached per-step RDP, computing it on first use.
+
+        The returned tensor is the cache itself and must not be modified.
+        """
+        if self._per_step_rdp is None:
+            self._per_step_rdp = torch.as_tensor(
+                tf_privacy.compute_rdp(
+                    self.sample_rate, self.noise_multiplier, 1, self._alphas_np
+                )
             )
-        )
-        return rdp
+        return self._per_step_rdp
 
     def get_privacy_spent(
         self, target_delta: Optional[float] = None
@@ -219,8 +325,8 @@ class PrivacyEngine:
         """
         if target_delta is None:
             target_delta = self.target_delta
-        rdp = self.get_renyi_divergence() * self.steps
-        return tf_privacy.get_privacy_spent(self.alphas, rdp, target_delta)
+        rdp = self._get_per_step_rdp() * self.steps
+        return tf_privacy.get_privacy_spent(self._orders, rdp.numpy(), target_delta)
 
     def step(self):
         """
@@ -242,8 +348,11 @@ class PrivacyEngine:
 
         """
         self.steps += 1
-        self.clipper.clip_and_accumulate()
-        clip_values, batch_size = self.clipper.pre_step()
+        # if step() directly follows virtual_step(), the accumulated gradients
+        # are already clipped and there are no new per-sample gradients
+        if self.clipper.has_grad_samples():
+            self.clipper.clip_and_accumulate()
+        params, clip_values, batch_size = self.clipper.pre_step()
 
         if batch_size > self.batch_size:
             raise ValueError(
@@ -260,12 +369,17 @@ class PrivacyEngine:
                 "dataloader to avoid this problem completely"
             )
 
-        params = (p for p in self.module.parameters() if p.requires_grad)
-        for p, clip_value in zip(params, clip_values):
-            noise = self._generate_noise(clip_value, p)
-            if self.loss_reduction == "mean":
-                noise /= batch_size
-            p.grad += noise
+        noise_multiplier = self.noise_multiplier
+        if noise_multiplier > 0:  # no noise is allocated in the non-private case
+            # fold the mean reduction into the noise scale so that noise is
+            # scaled and added to all the gradients with one kernel each
+            scale = noise_multiplier
+            if self._average_noise:
+                scale /= batch_size
+            noises = self._generate_batched_noise(
+                [scale * clip_value for clip_value in clip_values.tolist()], params
+            )
+            torch._foreach_add_([p.grad for p in params], noises)
 
     def to(self, device: Union[str, torch.device]) -> PrivacyEngine:
         """
@@ -294,6 +408,15 @@ class PrivacyEngine:
             This privacy engine
         """
         self.device = device
+        if self.secure_generator.device != torch.device(device):
+            # draw the seed of the new generator from the current one, so that
+            # moving does not replay the noise that was already generated
+            seed = torch.empty(
+                (), dtype=torch.int64, device=self.secure_generator.device
+            )
+            seed.random_(generator=self.secure_generator)
+            self.secure_generator = torch.Generator(device=device)
+            self.secure_generator.manual_seed(seed.item())
         return self
 
     def virtual_step(self):
@@ -341,40 +464,38 @@ class PrivacyEngine:
         """
         self.clipper.clip_and_accumulate()
 
-    def _generate_noise(
-        self, max_grad_norm: float, reference: nn.parameter.Parameter
-    ) -> torch.Tensor:
+    def _generate_batched_noise(
+        self, stds: List[float], references: List[nn.parameter.Parameter]
+    ) -> List[torch.Tensor]:
         r"""
-        Generates a tensor of Gaussian noise of the same shape as ``reference``.
+        Generates tensors of Gaussian noise of the same shapes as ``references``.
 
-        The generated tensor has zero mean and standard deviation
-        sigma = ``noise_multiplier x max_grad_norm ``
+        All the noise is drawn from the generator in a single call, split into
+        one tensor per reference and scaled with a single multi-tensor kernel.
+        The i-th tensor has zero mean and standard deviation ``stds[i]``.
 
         Parameters
         ----------
-        max_grad_norm : float
-            The maximum norm of the per-sample gradients.
-        reference : torch.nn.parameter.Parameter
-            The reference, based on which the dimention of the noise tensor
+        stds : List[float]
+            The standard deviation of the noise, one for each reference.
+        references : List[torch.nn.parameter.Parameter]
+            The references, based on which the dimentions of the noise tensors
             will be determined
 
         Returns
         -------
-        torch.Tensor
-            the generated noise with noise zero and standard
-            deviation of ``noise_multiplier x max_grad_norm ``
+        List[torch.Tensor]
+            the generated noise tensors, in the same order as ``references``
         """
-        if self.noise_multiplier > 0:
-            return torch.normal(
-                0,
-                self.noise_multiplier * max_grad_norm,
-                # pyre-fixme[16]: nn.parameter.Parameter has no attribute grad
-                reference.grad.shape,
-                device=self.device,
-                generator=self.secure_generator,
-            )
-        # pyre-fixme[7]: Expected `Tensor` but got `float`.
-        return 0.0
+        shapes = [p.grad.shape for p in references]  # pyre-ignore[16]
+        numels = [shape.numel() for shape in shapes]
+        flat_noise = torch.empty(sum(numels), device=self.device)
+        flat_noise.normal_(0, 1, generator=self.secure_generator)
+        noises = [
+            noise.view(shape) for noise, shape in zip(flat_noise.split(numels), shapes)
+        ]
+        torch._foreach_mul_(noises, stds)
+        return noises
 
     def _set_seed(self, secure_seed: Optional[int]):
         r"""
@@ -399,11 +520,7 @@ class PrivacyEngine:
             # pyre-fixme[16]: `PrivacyEngine` has no attribute `secure_seed`.
             self.secure_seed = secure_seed
         else:
-            self.secure_seed = int.from_bytes(
-                os.urandom(8), byteorder="big", signed=True
-            )
-        self.secure_generator = (
-            torch.random.manual_seed(self.secure_seed)
-            if self.device.type == "cpu"
-            else torch.cuda.manual_seed(self.secure_seed)
-        )
+            self.secure_seed = _get_secure_seed()
+        # pyre-fixme[16]: `PrivacyEngine` has no attribute `secure_generator`.
+        self.secure_generator = torch.Generator(device=self.device)
+        self.secure_generator.manual_seed(self.secure_seed)
@@ -0,0 +1,71 @@
+#!/usr/bin/env python3
+# Copyright (c) Facebook, Inc. and its affiliates. All Rights Reserved
+import importlib
+import math
+import sys
+import unittest
+from unittest.mock import patch
+
+import numpy as np
+from scipy import special
+from torchdp import privacy_analysis
+
+
+try:
+    import numba  # noqa: F401
+
+    HAS_NUMBA = True
+except ImportError:
+    HAS_NUMBA = False
+
+
+def reference_rdp_for_int_alpha(q: float, sigma: float, alpha: int) -> float:
+    """
+    RDP of the Sampled Gaussian Mechanism at integer order ``alpha``,
+    computed with scipy binomial coefficients (Section 3.3 of
+    https://arxiv.org/pdf/1908.10530.pdf).
+    """
+    log_a = -np.inf
+    for i in range(alpha + 1):
+        log_coef_i = (
+            math.log(special.binom(alpha, i))
+            + i * math.log(q)
+            + (alpha - i) * math.log(1 - q)
+        )
+        s = log_coef_i + (i * i - i) / (2 * (sigma ** 2))
+        log_a = np.logaddexp(log_a, s)
+    return log_a / (alpha - 1)
+
+
+class PrivacyAnalysis_test(unittest.TestCase):
+    def setUp(self):
+        self.SAMPLE_RATES = [0.001, 0.01, 0.1, 0.5]
+        self.NOISE_MULTIPLIERS = [0.5, 1.0, 4.0]
+        self.ORDERS = list(range(2, 64)) + [128, 256]
+
+    def assert_rdp_matches_reference(self, analysis):
+        for q in self.SAMPLE_RATES:
+            for sigma in self.NOISE_MULTIPLIERS:
+                rdp = analysis.compute_rdp(q, sigma, 1, self.ORDERS)
+                expected = [
+                    reference_rdp_for_int_alpha(q, sigma, alpha)
+                    for alpha in self.ORDERS
+                ]
+                np.testing.assert_allclose(
+                    rdp, expected, rtol=1e-7, err_msg=f"q = {q}, sigma = {sigma}"
+                )
+
+    @unittest.skipUnless(HAS_NUMBA, "numba is not installed")
+    def test_rdp_int_alpha(self):
+        self.assert_rdp_matches_reference(privacy_analysis)
+
+    def test_rdp_int_alpha_without_numba(self):
+        """
+        Reloads the accountant with numba unavailable, so that the loop runs
+        through the no-op ``njit`` fallback.
+        """
+        self.addCleanup(importlib.reload, privacy_analysis)
+        with patch.dict(sys.modules, {"numba": None}):
+            analysis = importlib.reload(privacy_analysis)
+        self.assertFalse(hasattr(analysis._log_a_for_int_alpha_kernel, "py_func"))
+        self.assert_rdp_matches_reference(analysis)
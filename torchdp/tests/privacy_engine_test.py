@@ -8,7 +8,9 @@ import torch.nn as nn
 import torch.nn.functional as F
 from torch.utils.data import DataLoader
 from torchdp import PrivacyEngine
+from torchdp import privacy_analysis as tf_privacy
 from torchdp.dp_model_inspector import IncompatibleModuleException
+from torchdp.privacy_engine import _get_secure_seed
 from torchdp.utils.module_inspection import get_layer_type, requires_grad
 from torchvision import models, transforms
 from torchvision.datasets import FakeData
@@ -156,6 +158,15 @@ class PrivacyEngine_test(unittest.TestCase):
         with self.assertRaises(ValueError):
             self.setUp_model_step(model, optimizer)
 
+    def test_throws_on_bad_loss_reduction(self):
+        with self.assertRaises(ValueError):
+            self.setUp_init_model(
+                private=True,
+                noise_multiplier=1.0,
+                max_grad_norm=1.0,
+                loss_reduction="max",
+            )
+
     def test_throws_double_attach(self):
         model, optimizer = self.setUp_init_model(private=True)
         self.setUp_model_step(model, optimizer)
@@ -187,6 +198,24 @@ class PrivacyEngine_test(unittest.TestCase):
         model, optimizer = self.setUp_init_model(private=True, model=model)
         self.setUp_model_step(model, optimizer)
 
+    def test_detach_restores_step(self):
+        model, optimizer = self.setUp_init_model(private=True)
+        self.setUp_model_step(model, optimizer)
+        optimizer.privacy_engine.detach()
+        self.setUp_model_step(model, optimizer)
+
+    def test_step_returns_closure_loss(self):
+        model, optimizer = self.setUp_init_model(private=True)
+        x, y = next(iter(self.dl))
+
+        def closure():
+            return self.criterion(model(x), y)
+
+        optimizer.zero_grad()
+        loss = closure()
+        loss.backward()
+        self.assertIsNotNone(optimizer.step(closure))
+
     def test_privacy_analysis_alpha_in_alphas(self):
         target_delta = 1e-5
         eps, alpha = self.private_optimizer.privacy_engine.get_privacy_spent(
@@ -201,6 +230,55 @@ class PrivacyEngine_test(unittest.TestCase):
         )
         self.assertTrue(eps > 0)
 
+    def test_privacy_analysis_matches_accountant(self):
+        target_delta = 1e-5
+        privacy_engine = self.private_optimizer.privacy_engine
+        eps, alpha = privacy_engine.get_privacy_spent(target_delta)
+        expected_eps, expected_alpha = tf_privacy.get_privacy_spent(
+            self.ALPHAS,
+            tf_privacy.compute_rdp(
+                privacy_engine.sample_rate,
+                privacy_engine.noise_multiplier,
+                privacy_engine.steps,
+                self.ALPHAS,
+            ),
+            target_delta,
+        )
+        self.assertAlmostEqual(eps, expected_eps)
+        self.assertEqual(alpha, expected_alpha)
+
+    def test_privacy_spent_keeps_alpha_type(self):
+        privacy_engine = self.private_optimizer.privacy_engine
+        privacy_engine.alphas = range(2, 32)
+        _, alpha = privacy_engine.get_privacy_spent()
+        self.assertIsInstance(alpha, np.integer)
+        self.assertIn(alpha, privacy_engine.alphas)
+
+    def test_renyi_divergence_cache_invalidation(self):
+        privacy_engine = self.private_optimizer.privacy_engine
+        rdp = privacy_engine.get_renyi_divergence()
+        eps, _ = privacy_engine.get_privacy_spent()
+
+        # modifying the returned tensor must not change the cached value
+        privacy_engine.get_renyi_divergence().mul_(0)
+        self.assertTrue(torch.equal(rdp, privacy_engine.get_renyi_divergence()))
+        self.assertEqual(eps, privacy_engine.get_privacy_spent()[0])
+
+        privacy_engine.noise_multiplier = 2 * privacy_engine.noise_multiplier
+        self.assertTrue(torch.all(privacy_engine.get_renyi_divergence() < rdp))
+
+    def test_freeze_layer_after_attach(self):
+        model, optimizer = self.setUp_init_model(private=True)
+        self.setUp_model_step(model, optimizer)
+
+        for p in model.fc2.parameters():
+            p.requires_grad = False
+            p.grad = None
+        self.setUp_model_step(model, optimizer)
+
+        for p in model.fc2.parameters():
+            self.assertIsNone(p.grad)
+
     def test_gradients_change(self):
         """
         Test that gradients are different after one step of SGD
@@ -390,34 +468,45 @@ class PrivacyEngine_test(unittest.TestCase):
         for p0, p1 in zip(first_model_params, second_model_params):
             self.assertTrue(torch.allclose(p0, p1))
 
-    def test_deterministic_noise_generation(self):
+    def test_secure_seeds_are_unique(self):
+        """
+        Tests that seeds dealt from the seed pool are not repeated,
+        including after the pool is exhausted and refilled.
+        """
+        seeds = [_get_secure_seed() for _ in range(1000)]
+        self.assertEqual(len(seeds), len(set(seeds)))
+
+    def test_batched_noise_generation(self):
         """
-        Tests that when secure seed is set for a model, the sequence
-        of the generated noise is the same.
-        It performs the following test:
-        1- Initiate a model, do one step, set the seed, and save the noise sequence
-        2- Do 3 more steps, set the seed, and save the noise sequnece
-        The two noise sequences should be the same, because the seed has been set
-        prior to calling the noise generation each time
+        Tests that noise generated in a single batch has the shapes of the
+        parameters' gradients, is reproducible once the seed is set, and comes
+        from the engine's own generator, so that reseeding the global generator
+        does not affect it.
         """
-        max_norm = 5
         model, optimizer = self.setUp_init_model(private=True)
-        self.setUp_model_step(model, optimizer)  # do one step so we have gradiants
+        self.setUp_model_step(model, optimizer)
         model_params = [p for p in model.parameters() if p.requires_grad]
+        stds = [5.0] * len(model_params)
 
         optimizer.privacy_engine._set_seed(20)
-        noise_generated_before = [
-            optimizer.privacy_engine._generate_noise(max_norm, p).detach().numpy()
-            for p in model_params
-        ]
-
-        for _ in range(3):
-            self.setUp_model_step(model, optimizer)
+        torch.manual_seed(0)
+        noise_generated_before = optimizer.privacy_engine._generate_batched_noise(
+            stds, model_params
+        )
+        for p, noise in zip(model_params, noise_generated_before):
+            self.assertEqual(p.grad.shape, noise.shape)
 
         optimizer.privacy_engine._set_seed(20)
-        noise_generated_after = [
-            optimizer.privacy_engine._generate_noise(max_norm, p).detach().numpy()
-            for p in model_params
-        ]
+        torch.manual_seed(1)
+        noise_generated_after = optimizer.privacy_engine._generate_batched_noise(
+            stds, model_params
+        )
+        for n0, n1 in zip(noise_generated_before, noise_generated_after):
+            self.assertTrue(torch.equal(n0, n1))
 
-        np.testing.assert_equal(noise_generated_before, noise_generated_after)
+        torch.manual_seed(0)
+        noise_generated_next = optimizer.privacy_engine._generate_batched_noise(
+            stds, model_params
+        )
+        for n0, n1 in zip(noise_generated_before, noise_generated_next):
+            self.assertFalse(torch.equal(n0, n1))
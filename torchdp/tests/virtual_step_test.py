@@ -168,6 +168,63 @@ class GradientAccumulation_test(unittest.TestCase):
             f"MAD is {(orig_grad - accumulated_grad).abs().mean()}"
         )
 
+    def test_step_after_virtual_step(self):
+        """
+        Calling optimizer.step() right after optimizer.virtual_step() should not clip
+        again, and use the gradients accumulated by the virtual steps.
+        """
+        self.setUp_privacy_engine(self.DATA_SIZE)
+        data = iter(self.dl)  # 4 batches of size 4 each
+
+        for _ in range(4):  # take 4 virtual steps
+            self.calc_per_sample_grads(data, num_steps=1)
+            self.optimizer.virtual_step()
+
+        self.optimizer.step()
+
+        # .grad should contain the average gradient over the entire dataset
+        accumulated_grad = torch.cat(
+            [p.grad.reshape(-1) for p in self.model.parameters() if p.requires_grad]
+        )
+
+        # the accumulated gradients in .grad without any hooks
+        orig_grad = self.effective_batch_grad
+
+        self.assertTrue(
+            torch.allclose(accumulated_grad, orig_grad, atol=10e-5, rtol=10e-3)
+        )
+
+    def test_repeated_virtual_step_throws(self):
+        """
+        Calling optimizer.virtual_step() twice without a backward pass in between
+        should fail, as there are no new per-sample gradients to clip.
+        """
+        self.setUp_privacy_engine(self.DATA_SIZE)
+        data = iter(self.dl)  # 4 batches of size 4 each
+
+        self.calc_per_sample_grads(data, num_steps=1)
+        self.optimizer.virtual_step()
+        with self.assertRaises(ValueError):
+            self.optimizer.virtual_step()
+
+    def test_step_after_partial_backward_throws(self):
+        """
+        Calling optimizer.step() after a backward pass that only reached some of
+        the layers should fail, rather than drop the new per-sample gradients.
+        """
+        self.setUp_privacy_engine(self.DATA_SIZE)
+        data = iter(self.dl)  # 4 batches of size 4 each
+
+        self.calc_per_sample_grads(data, num_steps=1)
+        self.optimizer.virtual_step()
+
+        # backward through fc2 only
+        _, y = next(data)
+        logits = self.model.fc2(torch.randn(len(y), 32 * 17))
+        self.criterion(logits, y).backward()
+        with self.assertRaises(ValueError):
+            self.optimizer.step()
+
     def test_mixed_accumulation(self):
         """
         Calling loss.backward() multiple times aggregates all per-sample gradients in